@@ -0,0 +1,85 @@
+# app/embedder_ort.py
+"""
+ONNX Runtime encoder for the sentence-transformers embedding model.
+
+The model is exported once with optimum, dynamically quantized to int8 and
+cached on disk; the InferenceSession is then shared by the whole process.
+Enabled from rag_utils with EMBEDDING_BACKEND=onnx.
+"""
+import os
+import threading
+from pathlib import Path
+from typing import List
+import numpy as np
+
+ORT_MODEL_DIR = Path(os.getenv("ORT_MODEL_DIR", "/models/onnx"))
+ORT_MAX_SEQ_LENGTH = int(os.getenv("ORT_MAX_SEQ_LENGTH", "256"))  # matches all-MiniLM-L6-v2
+QUANTIZED_FILE = "model_quantized.onnx"
+
+_session = None
+_tokenizer = None
+_lock = threading.Lock()
+
+def _model_dir(model_name: str) -> Path:
+    return ORT_MODEL_DIR / model_name.replace("/", "__")
+
+def _export_quantized(model_name: str, out_dir: Path):
+    """Export the HF model to ONNX and write an int8 dynamic-quantized copy."""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    model.save_pretrained(out_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(out_dir)
+    quantizer = ORTQuantizer.from_pretrained(model)
+    qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=out_dir, quantization_config=qconfig)
+
+def _get_session(model_name: str):
+    """Return the cached (session, tokenizer) pair, exporting the model on first use."""
+    global _session, _tokenizer
+    with _lock:
+        if _session is None:
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+
+            model_dir = _model_dir(model_name)
+            if not (model_dir / QUANTIZED_FILE).exists():
+                _export_quantized(model_name, model_dir)
+            opts = ort.SessionOptions()
+            opts.intra_op_num_threads = os.cpu_count() or 1
+            opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            _session = ort.InferenceSession(str(model_dir / QUANTIZED_FILE), opts,
+                                            providers=["CPUExecutionProvider"])
+            _tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    return _session, _tokenizer
+
+def encode(texts: List[str], model_name: str, batch_size: int = 64, normalize: bool = False) -> np.ndarray:
+    """Mean-pooled sentence embeddings, shape (n, d) float32; unit-norm rows if `normalize`."""
+    session, tokenizer = _get_session(model_name)
+    input_names = {i.name for i in session.get_inputs()}
+    # batch texts of similar length together so each batch pads as little as possible
+    order = np.argsort([len(t) for t in texts], kind="stable")
+    out = []
+    for start in range(0, len(texts), batch_size):
+        batch = [texts[i] for i in order[start:start + batch_size]]
+        enc = tokenizer(batch, padding=True, truncation=True,
+                        max_length=ORT_MAX_SEQ_LENGTH, return_tensors="np")
+        feeds = {k: v.astype(np.int64) for k, v in enc.items() if k in input_names}
+        token_embs = session.run(None, feeds)[0]  # (b, seq, d)
+        # mean pooling over non-padding tokens, as sentence-transformers does
+        mask = enc["attention_mask"][..., None].astype(np.float32)
+        summed = (token_embs * mask).sum(axis=1)
+        pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+        if normalize:
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        out.append(pooled)
+    if not out:
+        return np.empty((0, 0), dtype=np.float32)
+    embs = np.concatenate(out).astype(np.float32, copy=False)
+    # undo the length sort so rows line up with the input texts
+    inv = np.empty_like(order)
+    inv[order] = np.arange(len(order))
+    return embs[inv]
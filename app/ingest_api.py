@@ -1,111 +1,214 @@
 # app/ingest_api.py
 from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import os, json, datetime, uuid, tempfile
+import os, io, copy, datetime, uuid, tempfile, threading
+from concurrent.futures import ThreadPoolExecutor
 import boto3
+import orjson
+from cachetools import TTLCache
+from boto3.s3.transfer import TransferConfig
 
 # adapt these imports to match your rag_utils
 from app.rag_utils import load_text_file, split_docs, create_or_load_index  # existing helpers
 
 router = APIRouter()
 S3_BUCKET = os.environ.get("DATA_BUCKET", "")  # if empty -> fallback to local manifest
-s3 = boto3.client("s3", region_name=os.environ.get("AWS_REGION", "us-east-1"))
+_s3 = None  # created on first use; the local-manifest path never needs it
+# multipart/ranged transfers with 8 MB parts, 8 in flight (used by upload_fileobj/download_fileobj)
+TRANSFER_CONFIG = TransferConfig(multipart_threshold=8 * 1024 * 1024, multipart_chunksize=8 * 1024 * 1024,
+                                 use_threads=True, max_concurrency=8)
+INGEST_WORKERS = min(8, os.cpu_count() or 1)  # parallel download/load/split of source files
+
+# in-process manifest cache for read-only lookups; BackgroundTasks run in threads, hence the lock.
+# Read-modify-write paths bypass the cache (_fetch_manifest) and hold the lock instead.
+_manifest_cache = TTLCache(maxsize=1024, ttl=int(os.environ.get("MANIFEST_CACHE_TTL", "30")))
+_manifest_lock = threading.RLock()
+_manifest_gen = {}  # dataset_id -> number of puts, so a fetch that raced a put is not cached
 
 class VersionIngestRequest(BaseModel):
     dataset_id: str
-    source: str  # s3://... or local path for now
+    source: str  # local file/dir, s3://bucket/key or s3://bucket/prefix/
     version: str | None = None
     upsert: bool = False
 
+def _get_s3():
+    """Return the process-wide S3 client, creating it on first call."""
+    global _s3
+    if _s3 is None:
+        _s3 = boto3.client("s3", region_name=os.environ.get("AWS_REGION", "us-east-1"))
+    return _s3
+
 def manifest_key(dataset_id: str):
     return f"datasets/{dataset_id}/manifest.json"
 
+def _parse_s3_uri(uri: str):
+    """s3://bucket/key -> (bucket, key)"""
+    bucket, _, key = uri[len("s3://"):].partition("/")
+    if not bucket or not key:
+        raise ValueError(f"invalid S3 uri: {uri}")
+    return bucket, key
+
+def _download_s3_source(uri: str, dest_dir: str) -> str:
+    """Download an s3:// source into dest_dir (parallel ranged GETs for large objects)."""
+    bucket, key = _parse_s3_uri(uri)
+    # unique name: several keys under one prefix may share a basename
+    fd, local_path = tempfile.mkstemp(dir=dest_dir, suffix="_" + os.path.basename(key))
+    with os.fdopen(fd, "wb") as f:
+        _get_s3().download_fileobj(bucket, key, f, Config=TRANSFER_CONFIG)
+    return local_path
+
+def _list_sources(source: str):
+    """Expand a local directory or an s3:// prefix (ending in '/') into individual file sources."""
+    if source.startswith("s3://"):
+        bucket, _, prefix = source[len("s3://"):].partition("/")
+        if prefix and not prefix.endswith("/"):
+            return [source]
+        paginator = _get_s3().get_paginator("list_objects_v2")
+        return [f"s3://{bucket}/{obj['Key']}"
+                for page in paginator.paginate(Bucket=bucket, Prefix=prefix)
+                for obj in page.get("Contents", []) if not obj["Key"].endswith("/")]
+    if os.path.isdir(source):
+        return sorted(os.path.join(root, name) for root, _, files in os.walk(source) for name in files)
+    return [source]
+
+def _load_and_split(source: str, tmp_dir: str):
+    """Load one file source (downloading it first if on S3) and split it into chunks."""
+    if not source.startswith("s3://"):
+        return split_docs(load_text_file(source))
+    docs = load_text_file(_download_s3_source(source, tmp_dir))
+    # record the s3:// URI, not the temp file (deleted after ingest); this also keeps
+    # chunk metadata stable across re-ingests so a persisted index can be reused
+    for doc in docs:
+        doc.metadata["source"] = source
+    return split_docs(docs)
+
 def _get_manifest_local(path):
     if os.path.exists(path):
-        with open(path,"r") as f:
-            return json.load(f)
+        with open(path,"rb") as f:
+            return orjson.loads(f.read())
     return {"dataset_id": os.path.basename(path), "versions": []}
 
 def _put_manifest_local(path, manifest):
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path,"w") as f:
-        json.dump(manifest, f, indent=2)
+    with open(path,"wb") as f:
+        f.write(orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
 
 def get_manifest(dataset_id: str):
+    """
+    Return a copy of the dataset manifest for read-only lookups, served from the
+    TTL cache when fresh (it may be up to MANIFEST_CACHE_TTL seconds old).
+    Anything that modifies and puts the manifest must read it with
+    _fetch_manifest under _manifest_lock instead.
+    S3 read errors propagate and are never cached.
+    """
+    with _manifest_lock:
+        manifest = _manifest_cache.get(dataset_id)
+        gen = _manifest_gen.get(dataset_id, 0)
+    if manifest is None:
+        # I/O outside the lock; only cache the result if no put happened meanwhile
+        manifest = _fetch_manifest(dataset_id)
+        with _manifest_lock:
+            if _manifest_gen.get(dataset_id, 0) == gen:
+                _manifest_cache[dataset_id] = manifest
+    # keep the cached one intact even if the caller mutates its copy
+    return copy.deepcopy(manifest)
+
+def _fetch_manifest(dataset_id: str):
     if S3_BUCKET:
         try:
-            obj = s3.get_object(Bucket=S3_BUCKET, Key=manifest_key(dataset_id))
-            return json.loads(obj["Body"].read().decode())
-        except s3.exceptions.NoSuchKey:
-            return {"dataset_id": dataset_id, "versions": []}
-        except Exception:
+            obj = _get_s3().get_object(Bucket=S3_BUCKET, Key=manifest_key(dataset_id))
+            return orjson.loads(obj["Body"].read())
+        except _get_s3().exceptions.NoSuchKey:
+            # no manifest yet: a genuinely empty dataset
             return {"dataset_id": dataset_id, "versions": []}
     else:
         local_path = f"./data/{dataset_id}/manifest.json"
         return _get_manifest_local(local_path)
 
 def put_manifest(dataset_id: str, manifest: dict):
-    if S3_BUCKET:
-        s3.put_object(Bucket=S3_BUCKET, Key=manifest_key(dataset_id),
-                      Body=json.dumps(manifest).encode(), ContentType="application/json")
-    else:
-        local_path = f"./data/{dataset_id}/manifest.json"
-        _put_manifest_local(local_path, manifest)
+    with _manifest_lock:
+        if S3_BUCKET:
+            _get_s3().upload_fileobj(io.BytesIO(orjson.dumps(manifest)), S3_BUCKET, manifest_key(dataset_id),
+                              ExtraArgs={"ContentType": "application/json"}, Config=TRANSFER_CONFIG)
+        else:
+            local_path = f"./data/{dataset_id}/manifest.json"
+            _put_manifest_local(local_path, manifest)
+        _manifest_cache.pop(dataset_id, None)
+        _manifest_gen[dataset_id] = _manifest_gen.get(dataset_id, 0) + 1
 
 @router.post("/ingest/version")
 async def ingest_version(req: VersionIngestRequest, background_tasks: BackgroundTasks):
     ds = req.dataset_id
     version = req.version or datetime.datetime.utcnow().strftime("v%Y%m%dT%H%M%S")
-    manifest = get_manifest(ds)
-
-    # duplicate handling
-    if any(v["version"] == version for v in manifest["versions"]) and not req.upsert:
-        raise HTTPException(status_code=400, detail="version exists; set upsert=true to overwrite")
-
-    entry = {
-        "version": version,
-        "id": str(uuid.uuid4()),
-        "created_at": datetime.datetime.utcnow().isoformat(),
-        "source": req.source,
-        "status": "PENDING",
-        "chunks_indexed": 0,
-        "index_path": None
-    }
-
-    # upsert: remove old entry and append new
-    manifest["versions"] = [v for v in manifest["versions"] if v["version"] != version] + [entry]
-    put_manifest(ds, manifest)
+    # blocking manifest I/O under a threading lock: keep it off the event loop
+    entry = await run_in_threadpool(_add_version_entry, ds, version, req.source, req.upsert)
 
     background_tasks.add_task(_process_and_update_manifest, ds, version, req.source, entry["id"])
 
     return {"message": "ingest started", "dataset_id": ds, "version": version, "task_id": entry["id"]}
 
+def _add_version_entry(ds, version, source, upsert):
+    """Append a PENDING entry for `version` to the manifest (one locked read-modify-write)."""
+    with _manifest_lock:
+        manifest = _fetch_manifest(ds)  # read-modify-write: always read the stored manifest
+
+        # duplicate handling
+        if any(v["version"] == version for v in manifest["versions"]) and not upsert:
+            raise HTTPException(status_code=400, detail="version exists; set upsert=true to overwrite")
+
+        entry = {
+            "version": version,
+            "id": str(uuid.uuid4()),
+            "created_at": datetime.datetime.utcnow().isoformat(),
+            "source": source,
+            "status": "PENDING",
+            "chunks_indexed": 0,
+            "index_path": None
+        }
+
+        # upsert: remove old entry and append new
+        manifest["versions"] = [v for v in manifest["versions"] if v["version"] != version] + [entry]
+        put_manifest(ds, manifest)
+    return entry
+
+def _find_entry(manifest, version, entry_id):
+    return next((v for v in manifest["versions"] if v["version"] == version and v["id"] == entry_id), None)
+
 def _process_and_update_manifest(dataset_id, version, source, entry_id):
     # small wrapper to reuse your rag_utils pipeline (synchronous background)
+    # cheap pre-check only; this snapshot is never written back
+    if _find_entry(get_manifest(dataset_id), version, entry_id) is None:
+        return  # replaced by a later upsert of the same version; nothing to record
     try:
-        # 1) load docs (adapt path handling; support s3:// later)
-        # If source starts with s3:// just raise for now (we'll add S3 support in next block)
-        if source.startswith("s3://"):
-            raise RuntimeError("S3 source not supported in local dev; upload file to sample_docs/ and use local path for now")
-
-        docs = load_text_file(source)
-        chunks = split_docs(docs)
+        # 1) load + split every file in parallel (s3:// files are downloaded to a temp dir first)
+        sources = _list_sources(source)
+        if not sources:
+            raise RuntimeError(f"no files found under {source}")
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                ThreadPoolExecutor(max_workers=INGEST_WORKERS) as pool:
+            per_file = pool.map(lambda src: _load_and_split(src, tmp_dir), sources)
+            chunks = [c for file_chunks in per_file for c in file_chunks]
+        # 2) one index over all chunks so they are embedded in a single batched call;
         # store index locally under /tmp (use create_or_load_index to build)
         idx = create_or_load_index(chunks, persist_dir=f"/tmp/indexes/{dataset_id}/{version}")
-        # update manifest
-        manifest = get_manifest(dataset_id)
-        for v in manifest["versions"]:
-            if v["version"] == version and v["id"] == entry_id:
-                v["status"] = "INDEXED"
-                v["chunks_indexed"] = len(chunks)
-                v["index_path"] = f"/tmp/indexes/{dataset_id}/{version}"
-                v["indexed_at"] = datetime.datetime.utcnow().isoformat()
-        put_manifest(dataset_id, manifest)
+        update = {
+            "status": "INDEXED",
+            "chunks_indexed": len(chunks),
+            "index_path": f"/tmp/indexes/{dataset_id}/{version}",
+            "indexed_at": datetime.datetime.utcnow().isoformat(),
+        }
     except Exception as e:
-        manifest = get_manifest(dataset_id)
-        for v in manifest["versions"]:
-            if v["version"] == version and v["id"] == entry_id:
-                v["status"] = "FAILED"
-                v["error"] = str(e)
-        put_manifest(dataset_id, manifest)
+        update = {"status": "FAILED", "error": str(e)}
         # don't re-raise so background task finishes gracefully
+    # 3) one read-modify-write of the current manifest, after the slow work, so
+    # changes made by other requests/tasks in the meantime are kept
+    with _manifest_lock:
+        manifest = _fetch_manifest(dataset_id)  # fresh read, never the cached pre-check copy
+        entry = _find_entry(manifest, version, entry_id)
+        if entry is None:
+            return
+        entry.update(update)
+        if update["status"] == "INDEXED":
+            entry.pop("error", None)
+        put_manifest(dataset_id, manifest)
@@ -1,7 +1,8 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from pathlib import Path
-from app.rag_utils import load_text_file, split_docs, create_or_load_index, build_retriever
+from app.rag_utils import load_text_file, split_docs, create_or_load_index, build_retriever, embedder
 
 # === Initialize FastAPI app ===
 app = FastAPI(title="RAG Microservice (In-Memory)", version="1.0")
@@ -44,15 +45,17 @@ def ingest_docs():
     return {"message": "Index built successfully!", "chunks_indexed": len(chunks)}
 
 @app.post("/query", response_model=QueryResponse)
-def query_docs(request: QueryRequest):
+async def query_docs(request: QueryRequest):
     """
     Search the in-memory index for relevant chunks.
+    The query embedding is micro-batched with other concurrent queries.
     """
     global RETRIEVER
     if RETRIEVER is None:
         raise HTTPException(status_code=400, detail="No index loaded. Run /ingest first.")
 
-    results = RETRIEVER.get_relevant_documents(request.query, k=request.k)
+    qvec = await embedder.embed(request.query)
+    results = await run_in_threadpool(RETRIEVER.get_relevant_documents_by_vector, qvec, k=request.k)
     top_chunks = [r.page_content[:200] for r in results]
 
     return {"query": request.query, "top_chunks": top_chunks}
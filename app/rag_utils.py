@@ -1,54 +1,427 @@
 import os
+import json
+import asyncio
+import tempfile
+import threading
+from collections import namedtuple
 from pathlib import Path
 from typing import List, Dict, Any
 import numpy as np
+from scipy.linalg.blas import sgemv
+import faiss
+import torch
 from sentence_transformers import SentenceTransformer
 from langchain.document_loaders import TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from app.rag_utils_numba import topk_cos
 # === CONFIG ===
 MODEL_NAME = os.getenv("HUGGINGFACE_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
 EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "cpu")  # keep CPU for WSL
 EMBEDDING_DIR = Path("/tmp/embeddings_cache")  # optional persistence (not used in this simple impl)
+INDEX_TYPE = os.getenv("RAG_INDEX_TYPE", "flat")  # "flat" (float32 scan), "int8"/"binary" (quantized scan) or "faiss"
+NUMBA_MAX_ROWS = int(os.getenv("NUMBA_MAX_ROWS", "4096"))  # flat index: numba kernel below this size, BLAS above
+FAISS_IVF_MIN_ROWS = int(os.getenv("FAISS_IVF_MIN_ROWS", "100000"))  # switch HNSW -> IVF,PQ at this size
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # "torch" (sentence-transformers) or "onnx"
+TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS") or os.cpu_count() or 4)
+TORCH_COMPILE = os.getenv("TORCH_COMPILE", "0") == "1"  # compile the transformer with inductor (torch>=2)
 
-# Initialize sentence-transformers model (CPU)
-_model = SentenceTransformer(MODEL_NAME, device=EMBEDDING_DEVICE)
+# Inference only: fix the intra-op thread pool (process-wide). Autograd is turned
+# off per call via torch.inference_mode() in _embed_texts, since grad mode is thread-local.
+torch.set_num_threads(TORCH_NUM_THREADS)
+torch.backends.mkldnn.enabled = True
+
+# Initialize the embedding model (CPU) once per process
+if EMBEDDING_BACKEND == "onnx":
+    # int8-quantized ONNX Runtime session, exported on first use
+    from app import embedder_ort
+    _model = None
+else:
+    _model = SentenceTransformer(MODEL_NAME, device=EMBEDDING_DEVICE)
+    _model.eval()
+    if TORCH_COMPILE and hasattr(torch, "compile"):
+        # compile the HF transformer inside the sentence-transformers pipeline (compiling
+        # the SentenceTransformer wrapper itself would leave encode() on the eager path);
+        # dynamic=True avoids a recompile for every new batch/sequence shape
+        _model[0].auto_model = torch.compile(_model[0].auto_model, backend="inductor", dynamic=True)
 
 def _embed_texts(texts: List[str]) -> np.ndarray:
-    """Return numpy array of embeddings shape (n, d) and always 2-D."""
-    embs = _model.encode(texts, show_progress_bar=False, convert_to_numpy=True)
-    embs = np.asarray(embs, dtype=float)
+    """Return L2-normalized numpy array of embeddings shape (n, d) and always 2-D."""
+    if _model is None:
+        embs = embedder_ort.encode(texts, MODEL_NAME, batch_size=64, normalize=True)
+    else:
+        # sentence-transformers already length-sorts inside encode() and restores order;
+        # normalize_embeddings=True emits unit vectors straight from the model
+        # inference_mode is thread-local, so it is entered here rather than once at import
+        # (query batches are encoded on executor threads)
+        with torch.inference_mode():
+            embs = _model.encode(texts, batch_size=64, show_progress_bar=False, convert_to_numpy=True,
+                                 normalize_embeddings=True)
+    embs = np.asarray(embs, dtype=np.float32, order="C")
     if embs.ndim == 1:
         embs = np.expand_dims(embs, 0)
     return embs
 
+# Dummy encode so lazy kernel/session init is paid at import instead of on the first query
+_ = _embed_texts(["warmup"])
+EMBEDDING_DIM = _.shape[1]  # dimension produced by the active model/backend
+
+def _warmup_topk():
+    # JIT-compile the numba scan at import as well, for both specializations it sees:
+    # writable arrays (freshly built index) and read-only ones (mmap-loaded index)
+    normed = np.zeros((2, 4), dtype=np.float32)
+    q = np.zeros(4, dtype=np.float32)
+    sims = np.empty(2, dtype=np.float32)
+    topk_cos(normed, q, 1, sims)
+    normed.setflags(write=False)
+    topk_cos(normed, q, 1, sims)
+
+_warmup_topk()
+
 # Simple in-memory index structure
 class SimpleInMemoryIndex:
+    TEXTS_FILE = "texts.json"
+    NORMED_FILE = "normed.npy"
+    VECTOR_FILES = (NORMED_FILE,)  # files that must exist for load() to succeed
+
     def __init__(self, texts: List[str], metadatas: List[Dict[str, Any]] = None):
-        self.texts = texts
+        self._set_texts(texts)
         self.metadatas = metadatas or [{} for _ in texts]
-        self.embeddings = _embed_texts(texts)  # shape (n, d)
-        # Ensure 2-D
-        self.embeddings = np.atleast_2d(self.embeddings)
-        # Normalize rows for cosine similarity, avoid divide-by-zero
-        norms = np.linalg.norm(self.embeddings, axis=1, keepdims=True)
-        norms[norms == 0] = 1.0
-        self.normed = self.embeddings / norms
+        # _embed_texts already returns unit-norm float32 rows, so cosine similarity
+        # is a plain dot product against this matrix, shape (n, d)
+        self.normed = np.atleast_2d(_embed_texts(texts))
+        self._init_buffers()
 
-    def query(self, qtext: str, top_k: int = 3):
-        q_emb = _embed_texts([qtext])  # (1, d)
-        q_emb = np.atleast_2d(q_emb)
-        qnorm = q_emb / (np.linalg.norm(q_emb, axis=1, keepdims=True) + 1e-12)
-        sims = (self.normed @ qnorm.T).squeeze()
-        # Ensure sims is 1-D array even if only one doc
-        sims = np.asarray(sims)
-        if sims.ndim == 0:
-            sims = np.expand_dims(sims, 0)
-        top_idx = np.argsort(-sims)[:top_k]
+    def _set_texts(self, texts: List[str]):
+        # Chunk texts are packed into one UTF-8 buffer plus an (n + 1,) offsets
+        # array instead of n str objects; row i is blob[offsets[i]:offsets[i + 1]].
+        encoded = [t.encode("utf-8") for t in texts]
+        self._text_blob = b"".join(encoded)
+        self._offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded)),
+                  out=self._offsets[1:])
+
+    def _get_text(self, i: int) -> str:
+        return self._text_blob[self._offsets[i]:self._offsets[i + 1]].decode("utf-8")
+
+    @property
+    def texts(self) -> List[str]:
+        """All chunk texts, decoded on demand (used for persistence)."""
+        return [self._get_text(i) for i in range(len(self._offsets) - 1)]
+
+    def _init_buffers(self):
+        # Scratch buffer reused by every query; guarded by a lock because
+        # FastAPI runs sync endpoints on a thread pool.
+        self._sims_buf = np.empty(self.normed.shape[0], dtype=np.float32)
+        self._buf_lock = threading.Lock()
+
+    # --- persistence ---
+    def _dim(self) -> int:
+        return self.normed.shape[1]
+
+    @classmethod
+    def _embedding_info(cls, dim: int) -> Dict[str, Any]:
+        # what produced the vectors; a saved index is only reused if all of it matches.
+        # The index class is included because every type shares texts.json but
+        # writes different vector files, which may be left over from another type.
+        return {"index": cls.__name__, "model": MODEL_NAME, "backend": EMBEDDING_BACKEND, "dim": dim}
+
+    def save(self, persist_dir: str):
+        """Write vectors plus texts/metadata and the embedding model info to persist_dir."""
+        os.makedirs(persist_dir, exist_ok=True)
+        self._save_vectors(persist_dir)
+        with open(os.path.join(persist_dir, self.TEXTS_FILE), "w") as f:
+            json.dump({"texts": self.texts, "metadatas": self.metadatas,
+                       "embedding": self._embedding_info(self._dim())}, f)
+
+    def _save_vectors(self, persist_dir: str):
+        np.save(os.path.join(persist_dir, self.NORMED_FILE), self.normed)
+
+    def _load_vectors(self, persist_dir: str):
+        # memory-mapped read-only: pages are shared between worker processes
+        self.normed = np.load(os.path.join(persist_dir, self.NORMED_FILE), mmap_mode="r")
+        self._init_buffers()
+
+    @classmethod
+    def load(cls, persist_dir: str, texts: List[str] = None, metadatas: List[Dict[str, Any]] = None):
+        """
+        Load a saved index without re-embedding, or return None if there is none
+        or it does not match. The saved index must come from the current embedding
+        model, backend and dimension; when `texts`/`metadatas` are given it must
+        also have been built from exactly those.
+        """
+        texts_path = os.path.join(persist_dir, cls.TEXTS_FILE)
+        files = [texts_path] + [os.path.join(persist_dir, f) for f in cls.VECTOR_FILES]
+        if not all(os.path.exists(f) for f in files):
+            return None
+        with open(texts_path, "r") as f:
+            saved = json.load(f)
+        if saved.get("embedding") != cls._embedding_info(EMBEDDING_DIM):
+            return None
+        if texts is not None and saved["texts"] != texts:
+            return None
+        if metadatas is not None and saved["metadatas"] != metadatas:
+            return None
+        idx = cls.__new__(cls)
+        idx._set_texts(saved["texts"])
+        idx.metadatas = saved["metadatas"]
+        idx._load_vectors(persist_dir)
+        return idx
+
+    def _embed_query(self, qtext: str) -> np.ndarray:
+        """Return the L2-normalized float32 query vector, shape (d,)."""
+        return _embed_texts([qtext])[0]
+
+    @staticmethod
+    def _top_k(sims: np.ndarray, top_k: int) -> np.ndarray:
+        """Indices of the top_k highest scores, best first."""
+        # partial selection is O(n); only the top_k candidates get sorted
+        top_k = min(top_k, len(sims))
+        if top_k <= 0:
+            return np.empty(0, dtype=np.intp)
+        cand = np.argpartition(-sims, top_k - 1)[:top_k]
+        return cand[np.argsort(-sims[cand])]
+
+    def _results(self, top_idx, scores):
         results = []
-        for i in top_idx:
-            results.append({"text": self.texts[int(i)], "score": float(sims[int(i)]), "metadata": self.metadatas[int(i)]})
+        for i, score in zip(top_idx, scores):
+            results.append({"text": self._get_text(int(i)), "score": float(score), "metadata": self.metadatas[int(i)]})
         return results
 
+    def query(self, qtext: str, top_k: int = 3):
+        return self.search(self._embed_query(qtext), top_k)  # encode outside the lock
+
+    def search(self, qnorm: np.ndarray, top_k: int = 3):
+        """Top-k chunks for an already-embedded, unit-norm (d,) query vector."""
+        with self._buf_lock:
+            if self.normed.shape[0] < NUMBA_MAX_ROWS:
+                # small index: fused numba scan + heap top-k beats BLAS dispatch overhead
+                top_idx, scores = topk_cos(np.asarray(self.normed), qnorm, top_k, self._sims_buf)
+                return self._results(top_idx, scores)
+            # single-precision BLAS gemv called directly, written straight into
+            # the preallocated (n,) buffer. normed is C-ordered (n, d), so its
+            # transpose is a Fortran-ordered (d, n) view: trans=1 gives normed @ q
+            # without f2py copying the matrix.
+            sims = sgemv(1.0, np.asarray(self.normed).T, qnorm, y=self._sims_buf, overwrite_y=True, trans=1)
+            top_idx = self._top_k(sims, top_k)
+            return self._results(top_idx, sims[top_idx])
+
+def _quantize_int8(x: np.ndarray):
+    """Symmetric per-row int8 quantization: x ~= codes * scales[:, None]."""
+    x = np.atleast_2d(x)
+    scales = np.abs(x).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(x / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+def _spill_to_memmap(arr: np.ndarray) -> np.ndarray:
+    """
+    Copy `arr` into an unlinked temp file and return a read-only memmap of it, so
+    the data lives in reclaimable page cache instead of anonymous process memory.
+    """
+    with tempfile.TemporaryFile(prefix="rag_index_") as f:
+        out = np.memmap(f, dtype=arr.dtype, mode="w+", shape=arr.shape)
+        out[:] = arr
+        out.flush()
+        # the mapping keeps its own handle, so closing the (unlinked) file is fine
+        return np.memmap(f, dtype=arr.dtype, mode="r", shape=arr.shape)
+
+class Int8Index(SimpleInMemoryIndex):
+    """
+    SimpleInMemoryIndex variant that keeps only int8 codes (1/4 of float32) in
+    process memory and reranks the best `rerank_factor * top_k` candidates with
+    the exact float32 dot product. The float32 rows are read from a memory-mapped
+    file (normed.npy when loaded, a temp file when freshly built), and only the
+    candidate rows are touched per query.
+    This trades scan speed for resident memory: NumPy has no int8 GEMV kernel, so
+    the int32 einsum scan is slower than the flat index's float32 sgemv. Use it
+    when RAM, not latency, is the constraint.
+    """
+    CODES_FILE = "codes.npy"
+    SCALES_FILE = "scales.npy"
+    VECTOR_FILES = (SimpleInMemoryIndex.NORMED_FILE, CODES_FILE, SCALES_FILE)
+    rerank_factor = 4
+
+    def __init__(self, texts: List[str], metadatas: List[Dict[str, Any]] = None, rerank_factor: int = 4):
+        super().__init__(texts, metadatas)
+        self.rerank_factor = rerank_factor
+        self.codes, self.scales = _quantize_int8(self.normed)  # (n, d) int8, (n,) float32
+        self.normed = _spill_to_memmap(self.normed)  # rerank source, off the heap
+
+    def _save_vectors(self, persist_dir: str):
+        super()._save_vectors(persist_dir)
+        np.save(os.path.join(persist_dir, self.CODES_FILE), self.codes)
+        np.save(os.path.join(persist_dir, self.SCALES_FILE), self.scales)
+
+    def _load_vectors(self, persist_dir: str):
+        super()._load_vectors(persist_dir)
+        self.codes = np.load(os.path.join(persist_dir, self.CODES_FILE), mmap_mode="r")
+        self.scales = np.load(os.path.join(persist_dir, self.SCALES_FILE))
+
+    def search(self, qnorm: np.ndarray, top_k: int = 3):
+        q_codes, q_scale = _quantize_int8(qnorm)
+        # integer dot products accumulated in int32, then rescaled per row
+        approx = np.einsum("ij,j->i", self.codes, q_codes[0], dtype=np.int32)
+        approx = approx.astype(np.float32) * (self.scales * q_scale[0])
+        cand = self._top_k(approx, self.rerank_factor * top_k)
+        # exact float32 rerank on the candidate rows only
+        exact = np.dot(self.normed[cand], qnorm)
+        order = self._top_k(exact, top_k)
+        return self._results(cand[order], exact[order])
+
+# popcount of every uint8 value, for NumPy builds without np.bitwise_count (< 2.0)
+_POPCOUNT8 = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+def _popcount_rows(x: np.ndarray) -> np.ndarray:
+    """Number of set bits per row of a uint8 (n, m) array, as int32."""
+    counts = np.bitwise_count(x) if hasattr(np, "bitwise_count") else _POPCOUNT8[x]
+    return counts.sum(axis=1, dtype=np.int32)
+
+class BinaryIndex(SimpleInMemoryIndex):
+    """
+    SimpleInMemoryIndex variant that scans 1-bit sign codes (d/8 bytes per row,
+    32x smaller than float32) by Hamming distance and reranks the best
+    `rerank_factor * top_k` candidates with the exact float32 dot product.
+    As in Int8Index, the float32 rows are only read from a memory map for the
+    rerank. Sign bits keep only the rough direction of each vector, so recall@k
+    is lower than int8; raise rerank_factor if relevant chunks get dropped.
+    """
+    BITS_FILE = "bits.npy"
+    VECTOR_FILES = (SimpleInMemoryIndex.NORMED_FILE, BITS_FILE)
+    rerank_factor = 4
+
+    def __init__(self, texts: List[str], metadatas: List[Dict[str, Any]] = None, rerank_factor: int = 4):
+        super().__init__(texts, metadatas)
+        self.rerank_factor = rerank_factor
+        self.bits = np.packbits(self.normed > 0, axis=1)  # (n, d/8) uint8
+        self.normed = _spill_to_memmap(self.normed)  # rerank source, off the heap
+
+    def _save_vectors(self, persist_dir: str):
+        super()._save_vectors(persist_dir)
+        np.save(os.path.join(persist_dir, self.BITS_FILE), self.bits)
+
+    def _load_vectors(self, persist_dir: str):
+        super()._load_vectors(persist_dir)
+        self.bits = np.load(os.path.join(persist_dir, self.BITS_FILE), mmap_mode="r")
+
+    def search(self, qnorm: np.ndarray, top_k: int = 3):
+        qbits = np.packbits(qnorm > 0)
+        # matching bits = d - Hamming distance, so higher is better as for _top_k
+        hamming = _popcount_rows(np.bitwise_xor(self.bits, qbits))
+        cand = self._top_k(np.int32(self.normed.shape[1]) - hamming, self.rerank_factor * top_k)
+        # exact float32 rerank on the candidate rows only
+        exact = np.dot(self.normed[cand], qnorm)
+        order = self._top_k(exact, top_k)
+        return self._results(cand[order], exact[order])
+
+class FaissIndex(SimpleInMemoryIndex):
+    """
+    SimpleInMemoryIndex variant backed by a FAISS ANN index: HNSW below
+    FAISS_IVF_MIN_ROWS chunks, IVF,PQ above it. Both search by inner product,
+    which on unit-norm vectors is cosine similarity. HNSWFlat stores the float32
+    vectors, so its scores match the flat index; IVF,PQ scores are approximate
+    inner products reconstructed from the PQ codes (there is no float32 rerank),
+    so both ranking and scores can differ from the flat index.
+    The vectors live inside the FAISS index; `normed` is not kept.
+    """
+    INDEX_FILE = "index.faiss"
+    VECTOR_FILES = (INDEX_FILE,)
+
+    def __init__(self, texts: List[str], metadatas: List[Dict[str, Any]] = None):
+        super().__init__(texts, metadatas)
+        self.index = self._build(self.normed)
+        self.normed = None
+        self._sims_buf = None
+
+    @staticmethod
+    def _build(normed: np.ndarray):
+        n, d = normed.shape
+        # PQ trains 256-centroid codebooks, so IVF,PQ needs at least 256 rows
+        if n >= max(FAISS_IVF_MIN_ROWS, 256):
+            m = next(m for m in (48, 32, 24, 16, 8, 4, 2, 1) if d % m == 0)  # PQ needs d % m == 0
+            nlist = min(1024, n // 39)  # k-means wants ~39 training rows per list
+            index = faiss.index_factory(d, f"IVF{nlist},PQ{m}", faiss.METRIC_INNER_PRODUCT)
+            index.train(normed)
+            index.add(normed)
+            index.nprobe = min(16, nlist)
+        else:
+            index = faiss.IndexHNSWFlat(d, 32, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = 200
+            index.add(normed)
+            index.hnsw.efSearch = 64
+        return index
+
+    def search(self, qnorm: np.ndarray, top_k: int = 3):
+        top_k = min(top_k, self.index.ntotal)
+        if top_k <= 0:
+            return []
+        D, I = self.index.search(qnorm[None, :], top_k)
+        keep = I[0] >= 0  # FAISS pads with -1 when fewer hits are found
+        return self._results(I[0][keep], D[0][keep])
+
+    def _save_vectors(self, persist_dir: str):
+        faiss.write_index(self.index, os.path.join(persist_dir, self.INDEX_FILE))
+
+    def _dim(self) -> int:
+        return self.index.d
+
+    def _load_vectors(self, persist_dir: str):
+        self.index = faiss.read_index(os.path.join(persist_dir, self.INDEX_FILE))
+        self.normed = None
+        self._sims_buf = None
+
+# === Query micro-batching ===
+class QueryEmbedder:
+    """
+    Coalesces concurrent query embeddings: embed() calls that arrive within
+    `max_wait_ms` of each other (up to `max_batch`) share one _embed_texts call,
+    which runs in the default executor so the event loop is never blocked.
+    """
+    def __init__(self, max_batch: int = 32, max_wait_ms: float = 10.0):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._loop = None
+        self._queue = None
+        self._worker = None
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Return the L2-normalized float32 embedding of `text`, shape (d,)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker.done():
+            # (re)start the batching worker on the current event loop
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        fut = loop.create_future()
+        await self._queue.put((text, fut))
+        return await fut
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                embs = await loop.run_in_executor(None, _embed_texts, [t for t, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            for (_, fut), emb in zip(batch, embs):
+                if not fut.done():
+                    fut.set_result(emb)
+
+embedder = QueryEmbedder(max_batch=int(os.getenv("EMBED_MAX_BATCH", "32")),
+                         max_wait_ms=float(os.getenv("EMBED_MAX_WAIT_MS", "10")))
+
 # === Utility functions used by test script ===
 def load_text_file(path: str):
     """Load a .txt file into a list-of-documents (LangChain Document objects)."""
@@ -61,16 +434,29 @@ def split_docs(docs, chunk_size=800, overlap=100):
     chunks = splitter.split_documents(docs)
     return chunks
 
+_INDEX_TYPES = {"flat": SimpleInMemoryIndex, "int8": Int8Index, "binary": BinaryIndex, "faiss": FaissIndex}
+
 def create_or_load_index(chunks, persist_dir: str = None):
     """
-    Build a SimpleInMemoryIndex from list of langchain Document chunks.
-    persist_dir argument is accepted but ignored in this simple impl.
+    Build an index (type from RAG_INDEX_TYPE) from list of langchain Document chunks.
+    If persist_dir is given, an index saved there from the same chunks is loaded
+    (memory-mapped, no re-embedding); otherwise the new index is saved there.
     """
     texts = [c.page_content for c in chunks]
     metadatas = [getattr(c, "metadata", {}) for c in chunks]
-    idx = SimpleInMemoryIndex(texts, metadatas)
+    index_cls = _INDEX_TYPES.get(INDEX_TYPE, SimpleInMemoryIndex)
+    if persist_dir:
+        idx = index_cls.load(persist_dir, texts, metadatas)
+        if idx is not None:
+            return idx
+    idx = index_cls(texts, metadatas)
+    if persist_dir:
+        idx.save(persist_dir)
     return idx
 
+# retriever result: a simple object with page_content (to match previous expectations)
+D = namedtuple("D", "page_content")
+
 def build_retriever(index):
     """
     Return a simple retriever object with a `get_relevant_documents(query)` method
@@ -81,9 +467,9 @@ def build_retriever(index):
             self.index = index
         def get_relevant_documents(self, query, k=3):
             docs = self.index.query(query, top_k=k)
-            # convert to a simple object with page_content (to match previous expectations)
-            class D:
-                def __init__(self, txt):
-                    self.page_content = txt
+            return [D(d["text"]) for d in docs]
+        def get_relevant_documents_by_vector(self, qvec, k=3):
+            """Same as get_relevant_documents for a query already embedded by `embedder`."""
+            docs = self.index.search(qvec, top_k=k)
             return [D(d["text"]) for d in docs]
     return Retriever(index)
@@ -0,0 +1,58 @@
+# app/rag_utils_numba.py
+"""
+Numba kernel for the cosine top-k scan of small indexes, where BLAS dispatch
+overhead dominates: one parallel pass computes the dot products, then a
+size-k min-heap picks the best rows without sorting the whole score array.
+"""
+import numpy as np
+from numba import njit, prange
+
+@njit(cache=True)
+def _sift_down(heap_s, heap_i, pos, size):
+    # restore the min-heap property below `pos`
+    while True:
+        left = 2 * pos + 1
+        if left >= size:
+            return
+        child = left
+        right = left + 1
+        if right < size and heap_s[right] < heap_s[left]:
+            child = right
+        if heap_s[pos] <= heap_s[child]:
+            return
+        heap_s[pos], heap_s[child] = heap_s[child], heap_s[pos]
+        heap_i[pos], heap_i[child] = heap_i[child], heap_i[pos]
+        pos = child
+
+@njit(parallel=True, fastmath=True, cache=True)
+def topk_cos(normed, q, k, sims):
+    """
+    Scores every row of `normed` (n, d) against unit-norm `q` (d,) into the
+    preallocated `sims` (n,) buffer and returns (indices, scores) of the top k,
+    best first.
+    """
+    n, d = normed.shape
+    for i in prange(n):
+        acc = np.float32(0.0)
+        for j in range(d):
+            acc += normed[i, j] * q[j]
+        sims[i] = acc
+
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    heap_s = np.empty(k, dtype=np.float32)
+    heap_i = np.empty(k, dtype=np.int64)
+    for i in range(k):
+        heap_s[i] = sims[i]
+        heap_i[i] = i
+    for pos in range(k // 2 - 1, -1, -1):
+        _sift_down(heap_s, heap_i, pos, k)
+    for i in range(k, n):
+        if sims[i] > heap_s[0]:
+            heap_s[0] = sims[i]
+            heap_i[0] = i
+            _sift_down(heap_s, heap_i, 0, k)
+
+    order = np.argsort(-heap_s)
+    return heap_i[order], heap_s[order]